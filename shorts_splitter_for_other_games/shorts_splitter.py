@@ -51,7 +51,7 @@ def extract_clips(input_path, out_dir, start_times, clip_len, fmt):
         VIDEO_H = TARGET_H - BOTTOM_BAR
 
         if os.path.exists(icon_path) or os.path.exists(logo_path):
-            cmd = ["ffmpeg", "-nostdin", "-y", "-ss", str(start), "-t", str(clip_len), "-i", input_path]
+            cmd = ["ffmpeg", "-nostdin", "-y", "-hwaccel", "auto", "-ss", str(start), "-t", str(clip_len), "-i", input_path]
             # add image inputs
             img_idx = 1
             overlays = []
@@ -97,7 +97,7 @@ def extract_clips(input_path, out_dir, start_times, clip_len, fmt):
         else:
             # fallback: simple crop filter
             cmd = [
-                "ffmpeg", "-nostdin", "-y",
+                "ffmpeg", "-nostdin", "-y", "-hwaccel", "auto",
                 "-ss", str(start), "-t", str(clip_len),
                 "-i", input_path,
                 "-vf", CROP_FILTER,
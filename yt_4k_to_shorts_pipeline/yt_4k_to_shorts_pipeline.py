@@ -4,7 +4,9 @@ Full 4K Kill Extractor to Shorts/Reels Pipeline (Optimized Final Version)
 - Extracts "ENEMY DOWNED" clips from input.webm.
 - Merges all extracted clips globally (not part-wise) into pairs.
 - Converts merged clips into vertical 1080x1920 .webm (YouTube Shorts) and .mp4 (Insta Reels).
-- Automatically cleans all temporary files/folders after execution.
+- Automatically cleans all temporary clip folders after execution; small caches
+  (input.webm.meta.json, kill_template_*.png, overlay_bar_*.png) are kept
+  next to the script for later runs.
 """
 
 import os
@@ -12,23 +14,56 @@ import sys
 import gc
 import shutil
 import cv2
-import ffmpeg
+import numpy as np
 import subprocess
 import random
-from concurrent.futures import ThreadPoolExecutor
+import json
+import re
+from fractions import Fraction
+import queue
+import threading
+import multiprocessing as mp
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 # === USER CONFIGURATION ===
 KILL_KEYWORDS = ["ENEMY DOWNED"]
 PRE_SEC = 5
 POST_SEC = 5
 NUM_PARTS = 4
+NVDEC_BATCH = 16
 OCR_INTERVAL = 1.0
 OCR_RESIZE = 0.6
-MAX_THREADS = 2
+OCR_BATCH = 16
+READ_QUEUE_SIZE = 64
+PIPE_SIZE = 1 << 20     # Linux: kernel buffer for the OCR rawvideo pipe
+HUD_WHITE_LEVEL = 230   # luma level counted as HUD text white
+MIN_WHITE_PX = 150      # fewer bright pixels (in the downscaled region) -> skip OCR
+DEDUP_MAX_DIST = 5      # skip samples whose 16x16 region hash is this close to the last one sent (0 = off)
+OCR_FP16 = True         # half-precision OCR on CUDA/MPS
+# After the first OCR hit, detect kills by template match instead of OCR.
+# Only used with a single KILL_KEYWORDS entry: the template is per region
+# size, so once it took over, any other keyword would never be seen again.
+TEMPLATE_MATCH = True
+TEMPLATE_THRESHOLD = 0.75
+PIN_WORKERS = True          # Linux: give each part worker its own slice of CPUs
+LOW_PRIORITY_FFMPEG = True  # run clip cutting under nice/ionice (taskpolicy on macOS)
+CONVERT_WORKERS = None  # concurrent Shorts encodes; None = per encoder (see convert_workers())
+OCR_OPENVINO = True     # CPU-only hosts: run EasyOCR's text detector through OpenVINO if installed
 COOLDOWN_SEC = PRE_SEC + POST_SEC
+FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+FFPROBE = shutil.which("ffprobe") or "ffprobe"
 TARGET_WIDTH = 1080
 TARGET_HEIGHT = 1920
 
+# one case-insensitive scan per OCR result; tolerant of OCR'd extra spaces
+KILL_RE = re.compile("|".join(r"\s+".join(map(re.escape, kw.split())) for kw in KILL_KEYWORDS), re.IGNORECASE)
+USE_TEMPLATES = TEMPLATE_MATCH and len(KILL_KEYWORDS) == 1
+
 # === OCR Setup ===
 use_mps = False
 try:
@@ -36,148 +71,616 @@ try:
     use_mps = torch.backends.mps.is_available()
 except Exception:
     torch = None
-import easyocr
-reader = easyocr.Reader(['en'], gpu=use_mps)
-print(f"[INFO] EasyOCR initialized (MPS GPU available: {use_mps})")
+try:
+    from torchcodec.decoders import VideoDecoder
+except Exception:
+    VideoDecoder = None
+try:
+    import av
+except Exception:
+    av = None
+try:
+    import openvino.torch  # registers the "openvino" torch.compile backend
+    has_openvino = True
+except Exception:
+    has_openvino = False
 
-# === Utility Functions ===
-def ocr_frame(region_bgr):
-    if OCR_RESIZE != 1.0:
-        region_bgr = cv2.resize(region_bgr, None, fx=OCR_RESIZE, fy=OCR_RESIZE)
-    results = reader.readtext(region_bgr, detail=0)
-    return " ".join(results).strip()
+# EasyOCR is loaded lazily, once per process, on the first get_reader() call.
+# Part workers call init_ocr() first so they can be pinned to a GPU before CUDA
+# is touched; the parent process never loads the models.
+@lru_cache(maxsize=1)
+def get_reader():
+    import easyocr
+    use_cuda = torch is not None and torch.cuda.is_available()
+    gpu = use_mps or use_cuda
+    openvino = OCR_OPENVINO and has_openvino and not gpu
+    # Only CRAFT goes through OpenVINO: its input is the run's fixed region
+    # shape, so it compiles once. The recognizer sees a different crop width
+    # per batch and would keep recompiling, so it stays on PyTorch with
+    # EasyOCR's dynamic int8 quantization (which leaves CRAFT's convs alone).
+    reader = easyocr.Reader(['en'], gpu=gpu, cudnn_benchmark=True, quantize=True)
+    if openvino:
+        reader.detector = torch.compile(reader.detector, backend="openvino")
+    fp16 = fp16_device(reader.device)
+    if fp16:
+        reader.detector = fp16_forward(reader.detector, fp16)
+        reader.recognizer = fp16_forward(reader.recognizer, fp16)
+    backend = "OpenVINO detector" if openvino else f"FP16: {fp16 is not None}"
+    print(f"[INFO] EasyOCR initialized on {reader.device} ({backend})")
+    return reader
+
+@lru_cache(maxsize=None)
+def fp16_device(device):
+    """`device` if OCR should autocast to float16 there, else None.
 
-def get_video_duration(input_path):
+    Autocast rather than .half(): weights are cast per op (and cached), so
+    EasyOCR's own float32 input tensors still line up.
+    """
+    if not OCR_FP16 or device not in ("cuda", "mps"):
+        return None
     try:
-        result = subprocess.run([
-            "ffprobe", "-v", "error", "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1", input_path
-        ], capture_output=True, text=True, check=True)
-        return float(result.stdout.strip())
+        with torch.autocast(device_type=device, dtype=torch.float16):
+            pass
+        return device
     except Exception as e:
-        print(f"[ERROR] ffprobe failed: {e}")
+        print(f"[WARN] FP16 autocast unavailable on {device}: {e}")
         return None
 
-def split_video_into_parts(input_path, num_parts=NUM_PARTS, output_prefix="part"):
-    duration = get_video_duration(input_path)
-    if not duration:
-        return []
-    part_length = duration / num_parts
-    part_files = []
-    for i in range(num_parts):
-        start = i * part_length
-        out_file = f"{output_prefix}{i+1}.webm"
-        cmd = [
-            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
-            "-i", input_path, "-ss", str(start), "-t", str(part_length),
-            "-c", "copy", out_file
-        ]
-        subprocess.run(cmd, check=True)
-        part_files.append(out_file)
-        print(f"[INFO] Created part: {out_file} (start={start:.2f}s, len={part_length:.2f}s)")
-    return part_files
-
-def merge_clips_together(clip_files, merged_output_path):
-    # Handle empty list
-    if not clip_files:
-        print(f"[SKIP] No clips to merge → {merged_output_path}")
+def fp16_forward(module, device):
+    """Run only `module`'s forward under float16 autocast on `device`.
+
+    Outputs are cast back to float32: EasyOCR post-processes them in
+    numpy/cv2, and cv2.threshold rejects float16 score maps.
+    """
+    forward = module.forward
+    def forward_fp16(*args, **kwargs):
+        with torch.autocast(device_type=device, dtype=torch.float16):
+            return _as_float32(forward(*args, **kwargs))
+    module.forward = forward_fp16
+    return module
+
+def _as_float32(out):
+    if isinstance(out, torch.Tensor):
+        return out.float() if out.is_floating_point() else out
+    if isinstance(out, (tuple, list)):
+        return type(out)(_as_float32(o) for o in out)
+    return out
+
+@lru_cache(maxsize=1)
+def use_nvdec():
+    # Prefer NVDEC through torchcodec when CUDA is present: frames are decoded
+    # and cropped on the GPU so only the kill-feed corner is copied back.
+    return VideoDecoder is not None and torch is not None and torch.cuda.is_available()
+
+def init_ocr(gpu_id=None):
+    if gpu_id is not None:
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(gpu_id)
+    get_reader()
+    print(f"[INFO] Video decode backend: {'NVDEC (torchcodec)' if use_nvdec() else 'ffmpeg pipe'}")
+
+# === HUD Prefilter ===
+# Single-pass bright-pixel count over the grayscale region; compiled with Numba
+# when available so it runs without temporaries and without holding the GIL
+# in the decoder thread.
+try:
+    from numba import njit, prange
+except Exception:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, nogil=True, cache=True, fastmath=True)
+    def count_bright(roi, thr):
+        c = 0
+        for y in prange(roi.shape[0]):
+            for x in range(roi.shape[1]):
+                if roi[y, x] > thr:
+                    c += 1
+        return c
+
+    count_bright(np.zeros((2, 2), np.uint8), HUD_WHITE_LEVEL)  # compile up front
+else:
+    def count_bright(roi, thr):
+        return int((roi > thr).sum())
+
+# === Utility Functions ===
+_warmed_shapes = set()
+
+def has_hud_text(region):
+    """Cheap test for bright HUD text before paying for OCR."""
+    return count_bright(region, HUD_WHITE_LEVEL) >= MIN_WHITE_PX
+
+def region_hash(region):
+    """16x16 average hash of a grayscale region, as a flat bool array.
+
+    16x16 rather than the usual 8x8 so a single kill-feed line still flips bits.
+    """
+    small = cv2.resize(region, (16, 16), interpolation=cv2.INTER_AREA)
+    return (small > small.mean()).ravel()
+
+def ocr_batch(regions):
+    """OCR same-shaped grayscale regions in a single readtext_batched call.
+
+    Regions stay single-channel up to here, so the pipe, the ring buffer and
+    the prefilter move a third of the bytes; EasyOCR itself still expands them
+    to BGR for the detector.
+    """
+    shape = regions[0].shape
+    warmup_ocr(shape)
+    results = get_reader().readtext_batched(regions, **_ocr_opts(shape))
+    return [" ".join(r).strip() for r in results]
+
+def _ocr_opts(shape):
+    # regions are already at OCR size: stop CRAFT from magnifying them again
+    return dict(detail=0, mag_ratio=1.0, canvas_size=max(shape[:2]))
+
+def warmup_ocr(shape):
+    """Run the CRAFT detector on dummy batches of the run's fixed region shape.
+
+    On CUDA a few passes let cudnn_benchmark settle its kernels for that
+    shape; elsewhere one pass is enough to trigger the OpenVINO compile.
+    Blank regions yield no text boxes, so the recognizer isn't warmed.
+    """
+    if shape in _warmed_shapes:
         return
+    passes = 3 if get_reader().device == "cuda" else 1
+    dummy = [np.zeros(shape, np.uint8)] * OCR_BATCH
+    for _ in range(passes):
+        get_reader().readtext_batched(dummy, **_ocr_opts(shape))
+    _warmed_shapes.add(shape)
+
+def ocr_region_shape(width, height):
+    """(h, w) of the downscaled kill-feed region for a width x height video."""
+    x1, y1, x2, y2 = kill_feed_box(width, height)
+    return int((y2 - y1) * OCR_RESIZE), int((x2 - x1) * OCR_RESIZE)
+
+# "ENEMY DOWNED" is a fixed HUD glyph, so once OCR has confirmed one we cut it
+# out and find the rest with matchTemplate (one normalized cross-correlation
+# per sample) instead of CRAFT+CRNN. Templates are cached on disk per region
+# size; later runs reuse a cached one only once it has matched their first
+# OCR-confirmed hit, so a bad template can't disable detection for good.
+_templates = {}
+
+def template_path(shape):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, f"kill_template_{shape[1]}x{shape[0]}.png")
+
+def write_image(path, img):
+    """cv2.imwrite via a temp file renamed over `path`, so concurrent writers
+    and readers never see a half-written image."""
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+    cv2.imwrite(tmp, img)
+    os.replace(tmp, path)
+
+def get_kill_template(shape):
+    """Template confirmed for `shape` in this process, or None while OCR is still needed."""
+    return _templates.get(shape) if USE_TEMPLATES else None
 
-    # If only one clip, copy it (preserve original streams/quality)
-    if len(clip_files) == 1:
-        src = clip_files[0]
+def adopt_kill_template(region):
+    """Switch region.shape over to template matching after an OCR-confirmed hit.
+
+    A template cached by an earlier run is used only if it matches this hit;
+    otherwise a fresh one is cut from the region and replaces it on disk.
+    """
+    path = template_path(region.shape)
+    cached = cv2.imread(path, cv2.IMREAD_GRAYSCALE) if os.path.exists(path) else None
+    if cached is not None and cached.size and matches_template(region, cached):
+        _templates[region.shape] = cached
+        return
+    bootstrap_kill_template(region)
+
+def bootstrap_kill_template(region):
+    """Cut the keyword out of an OCR-confirmed region and cache it as the template."""
+    opts = dict(_ocr_opts(region.shape), detail=1)
+    results = get_reader().readtext(region, **opts)
+    for box, text, _ in results:
+        match = KILL_RE.search(text)
+        if not match:
+            continue
+        xs, ys = [int(p[0]) for p in box], [int(p[1]) for p in box]
+        x0, x1, y0, y1 = max(0, min(xs)), max(xs), max(0, min(ys)), max(ys)
+        # keep only the keyword's share of the box (player names sit beside it)
+        x0, x1 = x0 + (x1 - x0) * match.start() // len(text), x0 + (x1 - x0) * match.end() // len(text)
+        template = region[y0:y1, x0:x1].copy()
+        if template.size:
+            _templates[region.shape] = template
+            write_image(template_path(region.shape), template)
+            print(f"[INFO] Cached kill template {template.shape[1]}x{template.shape[0]} -> {template_path(region.shape)}")
+        return
+
+def matches_template(region, template):
+    if template.shape[0] > region.shape[0] or template.shape[1] > region.shape[1]:
+        return False
+    return cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED).max() >= TEMPLATE_THRESHOLD
+
+def iter_batches(samples, size):
+    """Group an iterable of (sec, region) samples into lists of up to `size`."""
+    batch = []
+    for sample in samples:
+        batch.append(sample)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _parse_rate(rate):
+    num, _, den = rate.partition("/")
+    den = int(den or 1)
+    return float(Fraction(int(num), den)) if den else 0.0
+
+def _probe_av(input_path):
+    # container header read in-process through libavformat, no subprocess
+    with av.open(input_path) as container:
+        stream = container.streams.video[0]
+        fps = float(stream.base_rate or stream.average_rate or 30.0)
+        if container.duration:
+            duration = container.duration / av.time_base
+        else:
+            duration = float(stream.duration * stream.time_base) if stream.duration else 0.0
+        return {
+            "duration": duration,
+            "fps": fps,
+            "nb_frames": int(stream.frames or round(duration * fps)),
+            "width": stream.codec_context.width,
+            "height": stream.codec_context.height,
+        }
+
+def _probe_ffprobe(input_path):
+    result = subprocess.run([
+        FFPROBE, "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", input_path
+    ], capture_output=True, text=True, check=True)
+    info = json.loads(result.stdout)
+    stream = next(s for s in info["streams"] if s.get("codec_type") == "video")
+    fps = _parse_rate(stream.get("r_frame_rate", "0/1")) or 30.0
+    duration = float(info["format"].get("duration") or stream.get("duration") or 0.0)
+    return {
+        "duration": duration,
+        "fps": fps,
+        "nb_frames": int(stream.get("nb_frames") or round(duration * fps)),
+        "width": int(stream["width"]),
+        "height": int(stream["height"]),
+    }
+
+def probe_video(input_path):
+    """Return duration/fps/nb_frames/width/height of the first video stream.
+
+    Read in-process with PyAV when it is installed, else from a single ffprobe
+    call. The result is cached next to the video as <name>.meta.json (keyed on
+    size and mtime) so reruns on the same input skip probing entirely.
+    """
+    cache_path = input_path + ".meta.json"
+    st = os.stat(input_path)
+    key = [st.st_size, st.st_mtime]
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["meta"]
+    except (OSError, ValueError):
+        pass
+
+    meta = _probe_av(input_path) if av is not None else _probe_ffprobe(input_path)
+    try:
+        with open(cache_path, "w") as f:
+            json.dump({"key": key, "meta": meta}, f)
+    except OSError:
+        pass
+    return meta
+
+def kill_feed_box(w, h):
+    """Top-right corner of the frame where the kill feed is drawn."""
+    return int(w * 0.70), 0, w, int(h * 0.25)
+
+def iter_feed_regions_nvdec(video_path, start=0.0, length=None):
+    """Yield OCR-ready grayscale (sec, region) samples, decoding and cropping on the GPU."""
+    decoder = VideoDecoder(video_path, device="cuda")
+    meta = decoder.metadata
+    fps = meta.average_fps or 30.0
+    frame_count = len(decoder)
+    first = int(round(start * fps))
+    last = frame_count if length is None else min(frame_count, int(round((start + length) * fps)))
+    print(f"[INFO] Processing {video_path} [{start:.1f}s-{last / fps:.1f}s] | FPS={fps:.1f} (NVDEC)")
+
+    x1, y1, x2, y2 = kill_feed_box(meta.width, meta.height)
+    th, tw = ocr_region_shape(meta.width, meta.height)
+    frame_step = max(1, int(round(fps * OCR_INTERVAL)))
+    chunk = frame_step * NVDEC_BATCH
+    # Downloads land in a preallocated pinned ring (same sizing rule as the
+    # ffmpeg reader) instead of a fresh host array per batch.
+    slots = -(-(READ_QUEUE_SIZE + 2 * OCR_BATCH) // NVDEC_BATCH) + 2
+    ring = torch.empty((slots, NVDEC_BATCH, th, tw), dtype=torch.uint8, pin_memory=True)
+    for k, begin in enumerate(range(first, last, chunk)):
+        batch = decoder.get_frames_in_range(begin, min(begin + chunk, last), step=frame_step)
+        # crop + RGB->luma + area downscale on the GPU, download only the
+        # OCR-sized grayscale kill feed (no per-region cv2.resize on the CPU)
+        rgb = batch.data[:, :, y1:y2, x1:x2].float()
+        luma = rgb[:, 0] * 0.299 + rgb[:, 1] * 0.587 + rgb[:, 2] * 0.114
+        if luma.shape[1:] != (th, tw):
+            luma = torch.nn.functional.interpolate(luma[:, None], size=(th, tw), mode="area")[:, 0]
+        host = ring[k % slots, :len(luma)]
+        host.copy_(luma.round_().to(torch.uint8))
+        regions = host.numpy()
+        for i, region in enumerate(regions):
+            yield (begin + i * frame_step) / fps, region
+
+def iter_feed_regions_ffmpeg(video_path, meta=None, start=0.0, length=None):
+    """Yield grayscale (sec, region) samples from an ffmpeg rawvideo pipe.
+
+    ffmpeg drops frames to the OCR rate, crops the kill feed and downscales it
+    before handing anything to Python, so full 4K frames never cross the pipe.
+    """
+    if meta is None:
+        meta = probe_video(video_path)
+    end = meta["duration"] if length is None else min(meta["duration"], start + length)
+    print(f"[INFO] Processing {video_path} [{start:.1f}s-{end:.1f}s] | FPS={meta['fps']:.1f}")
+
+    x1, y1, x2, y2 = kill_feed_box(meta["width"], meta["height"])
+    th, tw = ocr_region_shape(meta["width"], meta["height"])
+    proc = subprocess.Popen([
+        FFMPEG, "-nostdin", "-loglevel", "error", "-hwaccel", "auto",
+        "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", video_path,
+        "-vf", f"fps={1 / OCR_INTERVAL},crop={x2 - x1}:{y2 - y1}:{x1}:{y1},scale={tw}:{th}:flags=area",
+        "-f", "rawvideo", "-pix_fmt", "gray", "pipe:"
+    ], stdout=subprocess.PIPE)
+    # a 1 MiB pipe holds several regions, so ffmpeg isn't woken per 64 KiB
+    if fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
         try:
-            os.makedirs(os.path.dirname(merged_output_path), exist_ok=True)
-            shutil.copy2(src, merged_output_path)
-            print(f"[COPIED] single clip -> {merged_output_path}")
+            fcntl.fcntl(proc.stdout.fileno(), fcntl.F_SETPIPE_SZ, PIPE_SIZE)
+        except OSError:
+            pass  # above /proc/sys/fs/pipe-max-size; keep the default
+    # Frames are read straight into a preallocated ring instead of a new bytes
+    # object each time. The ring is larger than everything that can be in
+    # flight downstream (read queue + OCR batches), so a slot is never
+    # overwritten while its region is still queued.
+    ring = np.empty((READ_QUEUE_SIZE + 2 * OCR_BATCH + 2, th, tw), np.uint8)
+    try:
+        idx = 0
+        while True:
+            slot = ring[idx % len(ring)]
+            if proc.stdout.readinto(slot.data) < slot.nbytes:
+                break
+            yield start + idx * OCR_INTERVAL, slot
+            idx += 1
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    # only reached after reading to EOF: a failed ffmpeg just ends the pipe
+    # early, which would otherwise pass for a part without kills
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+def iter_feed_regions(video_path, meta=None, start=0.0, length=None):
+    """Yield (sec, region) samples from NVDEC when available, else from the ffmpeg pipe.
+
+    If NVDEC can't open the input or decode its first batch (no VP9 NVDEC on
+    this GPU, unsupported profile...), the part is read through ffmpeg instead.
+    """
+    if use_nvdec():
+        regions = iter_feed_regions_nvdec(video_path, start, length)
+        try:
+            first = next(regions, None)
         except Exception as e:
-            print(f"[ERROR] copying single clip: {e}")
-        return
-    list_file = os.path.join(os.path.dirname(merged_output_path), "merge_list.txt")
-    with open(list_file, "w") as f:
-        for c in clip_files:
-            f.write(f"file '{os.path.abspath(c)}'\n")
-    cmd = [
-        "ffmpeg", "-f", "concat", "-safe", "0", "-i", list_file,
-        "-c", "copy", "-y", merged_output_path
-    ]
-    subprocess.run(cmd, check=True)
-    os.remove(list_file)
-    print(f"[MERGED] {merged_output_path}")
+            print(f"[WARN] NVDEC cannot decode {video_path} ({e}); falling back to the ffmpeg pipe")
+        else:
+            if first is not None:
+                yield first
+                yield from regions
+            return
+    yield from iter_feed_regions_ffmpeg(video_path, meta, start, length)
 
-def find_and_extract(video_path, output_dir):
+def iter_queue(q):
+    """Yield items from a queue until the None sentinel arrives."""
+    while True:
+        item = q.get()
+        if item is None:
+            return
+        yield item
+
+def decode_worker(regions, read_q, errors, stop):
+    """Stage 1: decode and prefilter OCR-ready regions onto read_q.
+
+    A sample that looks the same as the last one sent would get the same OCR
+    answer, so it is dropped while it is within COOLDOWN_SEC of that one (a
+    repeated hit there would be ignored anyway). A banner that stays up
+    longer is sent again each cooldown, so a second kill behind it is still
+    found. The chain resets whenever the HUD goes dark, so a later identical
+    banner is still a new event.
+    """
+    prev, prev_sec = None, None
+    try:
+        for sec, region in regions:
+            if stop.is_set():
+                break
+            if not has_hud_text(region):
+                prev = None
+                continue
+            if DEDUP_MAX_DIST:
+                h = region_hash(region)
+                if (prev is not None and sec - prev_sec <= COOLDOWN_SEC
+                        and np.count_nonzero(h != prev) < DEDUP_MAX_DIST):
+                    continue
+                prev, prev_sec = h, sec
+            read_q.put((sec, region))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        regions.close()  # stops the ffmpeg child / releases the NVDEC decoder
+        read_q.put(None)
+
+def extract_worker(video_path, output_dir, write_q, extracted_files, errors):
+    """Stage 3: cut clips for detections as they arrive from the OCR stage."""
+    for found in iter_queue(write_q):
+        if errors:
+            continue  # keep draining so the OCR stage never blocks
+        try:
+            extracted_files.extend(extract_clips(video_path, found, output_dir, first_idx=len(extracted_files) + 1))
+        except Exception as e:
+            errors.append(e)
+
+def find_and_extract(video_path, output_dir, meta=None, start=0.0, length=None):
+    """OCR video_path over [start, start+length) and cut a clip around every kill."""
     os.makedirs(output_dir, exist_ok=True)
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"[ERROR] Cannot open {video_path}")
-        return []
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-    duration = frame_count / fps
-    print(f"[INFO] Processing {video_path} | FPS={fps:.1f}, Duration={duration:.1f}s")
+    regions = iter_feed_regions(video_path, meta, start, length)
 
-    ret, frame = cap.read()
-    if not ret:
-        return []
-    h, w = frame.shape[:2]
-    x1, x2 = int(w * 0.70), w
-    y1, y2 = 0, int(h * 0.25)
-    feed_box = (x1, y1, x2, y2)
-
-    found_times, last_found = [], -1e9
-    executor = ThreadPoolExecutor(max_workers=MAX_THREADS)
-    sec = 0.0
-    while sec < duration:
-        cap.set(cv2.CAP_PROP_POS_MSEC, sec * 1000)
-        ret, frame = cap.read()
-        if not ret:
-            sec += OCR_INTERVAL
-            continue
-        region = frame[y1:y2, x1:x2]
-        text = executor.submit(ocr_frame, region).result()
-        if text:
-            for kw in KILL_KEYWORDS:
-                if kw.lower() in text.lower() and sec - last_found > COOLDOWN_SEC:
-                    found_times.append(sec)
+    # decode -> OCR -> extract run concurrently; bounded queues apply
+    # back-pressure so a slow stage can't pile up 4K frames in RAM
+    read_q = queue.Queue(maxsize=READ_QUEUE_SIZE)
+    write_q = queue.Queue(maxsize=16)
+    extracted_files, errors = [], []
+    stop = threading.Event()
+    decoder = threading.Thread(target=decode_worker, args=(regions, read_q, errors, stop), daemon=True)
+    writer = threading.Thread(target=extract_worker, args=(video_path, output_dir, write_q, extracted_files, errors), daemon=True)
+    decoder.start()
+    writer.start()
+
+    # the region size is fixed for the whole run, so warm OCR up for exactly
+    # that shape while the decoder is still starting
+    if meta is not None:
+        warmup_ocr(ocr_region_shape(meta["width"], meta["height"]))
+
+    last_found = -1e9
+    try:
+        for batch in iter_batches(iter_queue(read_q), OCR_BATCH):
+            template = get_kill_template(batch[0][1].shape)
+            if template is not None:
+                hits = [(sec, "template match") for sec, region in batch if matches_template(region, template)]
+            else:
+                texts = ocr_batch([region for _, region in batch])
+                hits = []
+                for (sec, region), text in zip(batch, texts):
+                    match = KILL_RE.search(text) if text else None
+                    if match:
+                        hits.append((sec, match.group(0)))
+                        if USE_TEMPLATES and get_kill_template(region.shape) is None:
+                            adopt_kill_template(region)
+            found = []
+            for sec, how in hits:
+                if sec - last_found > COOLDOWN_SEC:
+                    found.append(sec)
                     last_found = sec
-                    print(f"[FOUND] '{kw}' at {sec:.2f}s")
-        sec += OCR_INTERVAL
+                    print(f"[FOUND] {how!r} at {sec:.2f}s")
+            if found:
+                write_q.put(found)
+    except BaseException:
+        # stop the decoder and keep unblocking its puts until it has exited,
+        # so its ffmpeg child and ring don't outlive the failed part
+        stop.set()
+        while decoder.is_alive():
+            try:
+                read_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise
+    finally:
+        write_q.put(None)
+        writer.join()
+    decoder.join()
+    if errors:
+        raise errors[0]
+    return extracted_files
 
-    cap.release()
-    executor.shutdown(wait=True)
+def extract_clips(video_path, found_times, output_dir, first_idx=1):
+    """Cut every detected kill window out of video_path with a single ffmpeg run."""
+    if not found_times:
+        return []
+    clip_len = PRE_SEC + POST_SEC
+    cmd = [FFMPEG, "-nostdin", "-loglevel", "error", "-y"]
+    # one seeked input per clip so every cut is a keyframe seek, not a read from 0
+    for ft in found_times:
+        start = max(0.0, ft - PRE_SEC)
+        cmd += ["-ss", f"{start:.3f}", "-t", str(clip_len), "-i", video_path]
     extracted_files = []
-
-    if found_times:
-        for idx, ft in enumerate(found_times, start=1):
-            start = max(0.0, ft - PRE_SEC)
-            clip_len = PRE_SEC + POST_SEC
-            out_file = os.path.join(output_dir, f"downed_clip_{idx}.webm")
-            (
-                ffmpeg
-                .input(video_path, ss=start, t=clip_len)
-                .output(out_file, c="copy", loglevel="error")
-                .run(overwrite_output=True)
-            )
-            extracted_files.append(out_file)
+    for idx in range(len(found_times)):
+        out_file = os.path.join(output_dir, f"downed_clip_{first_idx + idx}.webm")
+        cmd += ["-map", f"{idx}:v:0", "-map", f"{idx}:a:0?", "-c", "copy", "-avoid_negative_ts", "make_zero", out_file]
+        extracted_files.append(out_file)
+    subprocess.run(background_priority(cmd), check=True)
     return extracted_files
 
-def merge_all_globally(all_clips, merged_root):
-    os.makedirs(merged_root, exist_ok=True)
-    merged_outputs = []
-    # Merge in groups of 3 to form ~30s clips (if each clip is ~10s)
-    idx = 0
-    group_count = 0
-    while idx < len(all_clips):
-        group = all_clips[idx:idx+3]
-        group_count += 1
-        merged_out = os.path.join(merged_root, f"merged_shorts_{group_count}.webm")
-        merge_clips_together(group, merged_out)
-        merged_outputs.append(merged_out)
-        idx += 3
-    print(f"[INFO] Total merged global clips: {len(merged_outputs)}")
-    return merged_outputs
+def background_priority(cmd):
+    """Prefix an ffmpeg command so it runs at lowered CPU/IO priority.
+
+    Clip cutting happens while other parts are still decoding and running
+    OCR; it shouldn't steal cycles from them.
+    """
+    if not LOW_PRIORITY_FFMPEG:
+        return cmd
+    if sys.platform == "darwin" and shutil.which("taskpolicy"):
+        return ["taskpolicy", "-c", "utility", *cmd]
+    if sys.platform.startswith("linux") and shutil.which("ionice"):
+        return ["nice", "-n", "10", "ionice", "-c", "2", "-n", "7", *cmd]
+    return cmd
+
+def pin_worker(slot):
+    """Give part worker `slot` its own slice of the CPUs (Linux only).
+
+    Keeps each worker's torch/ffmpeg threads on a fixed set of cores instead
+    of all NUM_PARTS workers fanning out over every core.
+    """
+    if not PIN_WORKERS or not hasattr(os, "sched_setaffinity"):
+        return
+    cpus = sorted(os.sched_getaffinity(0))
+    share = max(1, len(cpus) // NUM_PARTS)
+    first = (slot * share) % len(cpus)
+    mine = cpus[first:first + share]
+    os.sched_setaffinity(0, mine)
+    if torch is not None:
+        torch.set_num_threads(len(mine))
+
+def load_progress(progress_path, key):
+    """{part: clips} for parts an earlier, interrupted run on the same input already finished."""
+    done = {}
+    try:
+        with open(progress_path) as f:
+            for line in f:
+                row = json.loads(line)
+                if row.get("key") == key and all(os.path.exists(c) for c in row["clips"]):
+                    done[row["part"]] = row["clips"]
+    except (OSError, ValueError):
+        pass
+    return done
+
+def save_progress(progress_path, key, part, clips):
+    with open(progress_path, "a") as f:
+        f.write(json.dumps({"key": key, "part": part, "clips": clips}) + "\n")
+
+def init_worker(counter, num_gpus):
+    """Pool initializer: claim a worker slot, pin it, and load OCR once per process.
+
+    Slots are handed out from a shared counter, so with several CUDA GPUs the
+    workers are spread over them round-robin.
+    """
+    with counter.get_lock():
+        slot = counter.value
+        counter.value += 1
+    pin_worker(slot)
+    init_ocr(worker_gpu(slot, num_gpus))
+
+def worker_gpu(slot, num_gpus):
+    """CUDA_VISIBLE_DEVICES entry for worker `slot`, or None without CUDA.
+
+    num_gpus only counts the GPUs the parent could see, so a mask the user
+    already set is indexed into rather than replaced by bare device numbers.
+    """
+    if not num_gpus:
+        return None
+    visible = [d.strip() for d in os.environ.get("CUDA_VISIBLE_DEVICES", "").split(",") if d.strip()]
+    if visible:
+        # CUDA stops at the first invalid entry; only the first num_gpus count
+        visible = visible[:num_gpus]
+        return visible[slot % len(visible)]
+    return str(slot % num_gpus)
+
+def process_part(task):
+    """Worker entry point: OCR one part and cut its clips (runs in a child process)."""
+    video_path, start, length, out_dir, meta = task
+    return find_and_extract(video_path, out_dir, meta=meta, start=start, length=length)
 
 # === Shorts Conversion ===
+MUSIC_EXTS = frozenset(('.mp3', '.wav', '.aac', '.m4a'))
+
 def is_video_file(filename):
     return filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv', '.webm'))
 
@@ -191,11 +694,12 @@ def init_music_pool(background_music_dir):
     MUSIC_POOL = []
     if not os.path.exists(background_music_dir):
         return
-    files = [f for f in os.listdir(background_music_dir) if f.lower().endswith(('.mp3', '.wav', '.aac', '.m4a'))]
+    with os.scandir(background_music_dir) as entries:
+        files = [e.path for e in entries if e.is_file() and os.path.splitext(e.name)[1].lower() in MUSIC_EXTS]
     if not files:
         return
     random.shuffle(files)
-    MUSIC_POOL = [os.path.join(background_music_dir, f) for f in files]
+    MUSIC_POOL = files
 
 def pick_music():
     """Return the next music path from the pool (non-repeating). Returns None if pool exhausted."""
@@ -204,65 +708,188 @@ def pick_music():
         return None
     return MUSIC_POOL.pop()
 
-def convert_to_vertical_webm(input_path, output_path, script_dir):
+H264_RATE = ["-b:v", "6M", "-maxrate", "8M", "-bufsize", "12M"]
+
+@lru_cache(maxsize=1)
+def pick_encoder():
+    """(vcodec, extra ffmpeg args) for H.264 output, probed once per process.
+
+    NVENC when CUDA is present, VideoToolbox on macOS, else libx264.
+    """
+    try:
+        encoders = subprocess.run([FFMPEG, "-hide_banner", "-encoders"], capture_output=True, text=True).stdout
+    except OSError:
+        encoders = ""
+    if "h264_nvenc" in encoders and torch is not None and torch.cuda.is_available():
+        return "h264_nvenc", ["-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", "23", *H264_RATE]
+    if sys.platform == "darwin" and "h264_videotoolbox" in encoders:
+        return "h264_videotoolbox", H264_RATE
+    return "libx264", ["-preset", "veryfast", "-crf", "20"]
+
+def hw_h264_encoder():
+    vcodec, _ = pick_encoder()
+    return vcodec if vcodec != "libx264" else None
+
+def encoder_threads():
+    # software encoders split the cores between the concurrent Shorts encodes
+    return max(1, (os.cpu_count() or 2) // convert_workers())
+
+def h264_args():
+    vcodec, extra = pick_encoder()
+    if vcodec == "libx264":
+        extra = [*extra, "-threads", str(encoder_threads())]
+    return ["-c:v", vcodec, *extra, "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart"]
+
+def convert_workers():
+    """How many Shorts to encode at once without oversubscribing the encoder.
+
+    VideoToolbox is one shared engine, consumer NVENC allows a few sessions;
+    software encodes get half the cores (OCR workers are still running).
+    """
+    if CONVERT_WORKERS:
+        return CONVERT_WORKERS
+    limits = {"h264_videotoolbox": 2, "h264_nvenc": 3}
+    return limits.get(pick_encoder()[0]) or max(1, (os.cpu_count() or 2) // 2)
+
+def shorts_extension():
+    # with a hardware H.264 encoder the Shorts are written straight to .mp4
+    return ".mp4" if hw_h264_encoder() else ".webm"
+
+BAR_HEIGHT = 200
+
+def _read_overlay(path, size):
+    """Read an overlay image resized to `size` (w, h), alpha already applied over black."""
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return None
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    if img.shape[2] == 4:
+        alpha = img[:, :, 3:].astype(np.float32) / 255.0
+        img = (img[:, :, :3] * alpha).round().astype(np.uint8)
+    return img
+
+def bottom_bar(script_dir):
+    """Path of the pre-composited black bottom bar with icon and logo, or None.
+
+    Built once in main_pipeline() before the converter threads start (and only
+    rebuilt when the icon or logo change), so every Short needs a single
+    overlay instead of decoding and scaling both images again.
+    """
     icon_path = os.path.join(script_dir, 'generic_icon.png')
     logo_path = os.path.join(script_dir, 'channel_logo.jpg')
-    background_music_dir = os.path.join(script_dir, 'background_musics')
-    # pick a non-repeating music track from the global pool (initialized in main)
-    music_path = pick_music()
+    sources = [p for p in (icon_path, logo_path) if os.path.exists(p)]
+    if not sources:
+        return None
+    bar_path = os.path.join(script_dir, f"overlay_bar_{TARGET_WIDTH}x{BAR_HEIGHT}.png")
+    if os.path.exists(bar_path) and os.path.getmtime(bar_path) >= max(map(os.path.getmtime, sources)):
+        return bar_path
 
-    video = (
-        ffmpeg
-        .input(input_path)
-        .filter('scale', -1, TARGET_HEIGHT - 200)
-        .filter('crop', f"if(gt(in_w,{TARGET_WIDTH}),{TARGET_WIDTH},in_w)", TARGET_HEIGHT - 200, '(in_w-out_w)/2', 0)
-        .filter('pad', TARGET_WIDTH, TARGET_HEIGHT, 0, 0, color='black')
-    )
+    bar = np.zeros((BAR_HEIGHT, TARGET_WIDTH, 3), np.uint8)
+    # same placement as the old per-clip overlays: icon bottom-left, logo bottom-right
+    for path, (w, h), (x, y) in (
+        (icon_path, (300, 200), (0, 0)),
+        (logo_path, (180, 180), (TARGET_WIDTH - 200, BAR_HEIGHT - 190)),
+    ):
+        img = _read_overlay(path, (w, h)) if os.path.exists(path) else None
+        if img is not None:
+            bar[y:y + h, x:x + w] = img
+    write_image(bar_path, bar)
+    return bar_path
+
+@lru_cache(maxsize=None)
+def vertical_graph(with_bar, split):
+    """filter_complex string for the vertical layout, built once per variant.
 
-    if os.path.exists(icon_path):
-        video = video.overlay(
-            ffmpeg.input(icon_path).filter('scale', 300, 200),
-            x=0,
-            y=TARGET_HEIGHT - 200
-        )
-    if os.path.exists(logo_path):
-        video = video.overlay(
-            ffmpeg.input(logo_path).filter('scale', 180, 180),
-            x=f'{TARGET_WIDTH}-200',
-            y=f'{TARGET_HEIGHT}-190'
-        )
-
-    vp9_settings = dict(
-        vcodec='libvpx-vp9',
-        acodec='libopus',
-        crf=30,
-        **{"b:v": "0"},
-        audio_bitrate='128k',
-        **{"deadline": "realtime", "cpu-used": "4"},
-        pix_fmt='yuv420p'
+    Input 0 is the clip, input 1 the pre-composited bottom bar (if any). The
+    result ends in [vout], or [shorts]/[reels] when split for the Reels copy.
+    """
+    band = TARGET_HEIGHT - BAR_HEIGHT
+    out = "[vbase]" if split else "[vout]"
+    padded = "[v0]" if with_bar else out
+    graph = (
+        f"[0:v]scale=-1:{band},crop='if(gt(in_w,{TARGET_WIDTH}),{TARGET_WIDTH},in_w)':{band}:(in_w-out_w)/2:0,"
+        f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:0:0:black{padded}"
     )
+    if with_bar:
+        graph += f";[v0][1:v]overlay=0:{band}{out}"
+    if split:
+        graph += ";[vbase]split=2[shorts][reels]"
+    return graph
+
+def concat_list(clip_files):
+    """Concat-demuxer script for clip_files, fed to ffmpeg on stdin."""
+    return "".join(f"file '{os.path.abspath(c)}'\n" for c in clip_files).encode()
+
+def convert_to_vertical_webm(clip_files, output_path, bar_path=None, reels_path=None):
+    """Join clip_files and render them as one 1080x1920 Short in a single filter_complex run.
+
+    The clips go through the concat demuxer straight into the vertical graph,
+    so no merged intermediate is written or decoded twice.
 
+    `bar_path` is the bottom_bar() image, if any.
+    .mp4 outputs use pick_encoder()'s H.264 encoder, .webm outputs libvpx-vp9.
+    With `reels_path`, the same graph also feeds the H.264 Reels copy: split
+    off a .webm Short in the same run, or copied from an .mp4 Short.
+    """
+    # pick a non-repeating music track from the global pool (initialized in main)
+    music_path = pick_music()
+
+    cmd = [
+        FFMPEG, "-nostdin", "-loglevel", "error", "-y", "-hwaccel", "auto",
+        "-f", "concat", "-safe", "0", "-protocol_whitelist", "file,pipe", "-i", "pipe:0",
+    ]
+    if bar_path:
+        cmd += ["-i", bar_path]
     if music_path:
-        out = ffmpeg.output(video, ffmpeg.input(music_path, stream_loop=-1).audio, output_path, shortest=None, **vp9_settings)
+        cmd += ["-stream_loop", "-1", "-i", music_path]
+    audio = ["-map", f"{2 if bar_path else 1}:a", "-shortest"] if music_path else []
+
+    is_mp4 = output_path.lower().endswith(".mp4")
+    split = reels_path is not None and not is_mp4
+    cmd += ["-filter_complex", vertical_graph(bar_path is not None, split)]
+
+    cmd += ["-map", "[shorts]" if split else "[vout]", *audio, "-pix_fmt", "yuv420p"]
+    if is_mp4:
+        cmd += h264_args()
     else:
-        out = ffmpeg.output(video, output_path, **vp9_settings)
-    out.global_args('-nostdin', '-loglevel', 'error').overwrite_output().run()
-
-def convert_webm_to_mp4(input_folder, output_folder, label):
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    for file in os.listdir(input_folder):
-        if file.lower().endswith('.webm'):
-            input_path = os.path.join(input_folder, file)
-            output_path = os.path.join(output_folder, os.path.splitext(file)[0] + ".mp4")
-            crop_filter = "crop=in_h*9/16:in_h:(in_w-out_w)/2:0,scale=1080:1920"
-            subprocess.run([
-                "ffmpeg", "-i", input_path, "-vf", crop_filter,
-                "-c:v", "h264_videotoolbox", "-b:v", "6M", "-maxrate", "8M",
-                "-bufsize", "12M", "-c:a", "aac", "-b:a", "128k",
-                "-movflags", "+faststart", "-y", output_path
-            ], check=True)
-    print(f"[DONE] {label} conversion complete → {output_folder}")
+        cmd += [
+            "-c:v", "libvpx-vp9", "-crf", "30", "-b:v", "0", "-deadline", "realtime", "-cpu-used", "4",
+            # 1080 wide allows 4 tile columns (log2 = 2); row-mt threads within them
+            "-row-mt", "1", "-tile-columns", "2", "-frame-parallel", "1", "-lag-in-frames", "0",
+            "-threads", str(encoder_threads()),
+            "-c:a", "libopus", "-b:a", "128k",
+        ]
+    cmd.append(output_path)
+    if split:
+        cmd += ["-map", "[reels]", *audio, "-pix_fmt", "yuv420p", *h264_args(), reels_path]
+    subprocess.run(cmd, input=concat_list(clip_files), check=True)
+    if reels_path is not None and is_mp4:
+        # the hardware-encoded Short already is the Reels file: hardlink it,
+        # falling back to a copy across filesystems
+        if os.path.exists(reels_path):
+            os.remove(reels_path)
+        try:
+            os.link(output_path, reels_path)
+        except OSError:
+            shutil.copy2(output_path, reels_path)
+
+def convert_worker(convert_q, youtube_shorts_dir, reels_dir, bar_path, errors):
+    """Encode clip groups into vertical Shorts + Reels as they arrive, while later parts are still in OCR.
+
+    Several of these share convert_q; each exits on its own None sentinel.
+    """
+    for base, group in iter_queue(convert_q):
+        if errors:
+            continue  # keep draining so the grouping side never blocks
+        out_path = os.path.join(youtube_shorts_dir, f"{base}_vertical4k{shorts_extension()}")
+        reels_path = os.path.join(reels_dir, f"{base}_vertical4k.mp4")
+        try:
+            convert_to_vertical_webm(group, out_path, bar_path, reels_path)
+            print(f"[MERGED] {len(group)} clip(s) -> {out_path}")
+        except Exception as e:
+            errors.append(e)
 
 # === MAIN PIPELINE ===
 def main_pipeline():
@@ -272,48 +899,116 @@ def main_pipeline():
         print("[ERROR] input.webm not found.")
         sys.exit(1)
 
-    print("[INFO] Splitting video into parts...")
-    parts = split_video_into_parts(video_path, num_parts=NUM_PARTS, output_prefix=os.path.join(script_dir, "part"))
+    if TEMPLATE_MATCH and not USE_TEMPLATES:
+        print(f"[INFO] Template matching off: it only supports one keyword, {len(KILL_KEYWORDS)} configured")
 
-    all_extracted = []
-    for i, part in enumerate(parts, start=1):
-        print(f"\n[INFO] Processing part {i}/{len(parts)}")
-        out_dir = os.path.join(script_dir, "Downed_clips", f"part{i}")
-        clips = find_and_extract(part, out_dir)
-        all_extracted.extend(clips)
-        os.remove(part)  # delete part immediately to save space
+    meta = probe_video(video_path)
+    if not meta["duration"]:
+        print("[ERROR] Could not determine input duration.")
+        sys.exit(1)
 
-    if not all_extracted:
-        print("[INFO] No ENEMY DOWNED events found.")
-        return
+    # Parts are logical time ranges of input.webm: each worker seeks straight
+    # to its range, so the input is never split/rewritten on disk.
+    part_length = meta["duration"] / NUM_PARTS
+    downed_root = os.path.join(script_dir, "Downed_clips")
+    tasks = [
+        (video_path, i * part_length, part_length, os.path.join(downed_root, f"part{i + 1}"), meta)
+        for i in range(NUM_PARTS)
+    ]
 
-    merged_root = os.path.join(script_dir, "Merged_All_Parts")
-    merged_outputs = merge_all_globally(all_extracted, merged_root)
+    # Finished parts are checkpointed to Downed_clips/progress.jsonl (removed
+    # with the folder after a successful run), so a rerun after a crash skips
+    # their OCR. Rows only count for the same input file and part layout.
+    os.makedirs(downed_root, exist_ok=True)
+    progress_path = os.path.join(downed_root, "progress.jsonl")
+    st = os.stat(video_path)
+    run_key = [st.st_size, st.st_mtime, NUM_PARTS]
+    done = load_progress(progress_path, run_key)
+    if done:
+        print(f"[INFO] Resuming: {len(done)}/{NUM_PARTS} part(s) already processed")
 
     youtube_shorts_dir = os.path.join(script_dir, "youtube_shorts")
+    reels_dir = os.path.join(script_dir, "insta_reels")
     os.makedirs(youtube_shorts_dir, exist_ok=True)
+    os.makedirs(reels_dir, exist_ok=True)
 
     # initialize music pool (non-repeating) for this run
     background_music_dir = os.path.join(script_dir, 'background_musics')
     init_music_pool(background_music_dir)
+    bar_path = bottom_bar(script_dir)
 
-    for file in merged_outputs:
-        base = os.path.splitext(os.path.basename(file))[0]
-        out_path = os.path.join(youtube_shorts_dir, f"{base}_vertical4k.webm")
-        convert_to_vertical_webm(file, out_path, script_dir)
+    # parts finish in order; every complete group of 3 clips (~30s if each
+    # clip is ~10s) is handed to the converter threads right away, so the
+    # vertical encodes of early groups overlap OCR of the later parts (and
+    # each other)
+    workers = convert_workers()
+    convert_q = queue.Queue(maxsize=workers)
+    convert_errors = []
+    converters = [
+        threading.Thread(target=convert_worker, args=(convert_q, youtube_shorts_dir, reels_dir, bar_path, convert_errors), daemon=True)
+        for _ in range(workers)
+    ]
+    for t in converters:
+        t.start()
 
-    reels_dir = os.path.join(script_dir, "insta_reels")
-    convert_webm_to_mp4(youtube_shorts_dir, reels_dir, label="Insta Reels")
+    pending, groups = [], 0
+    def flush(clips):
+        nonlocal groups
+        for idx in range(0, len(clips), 3):
+            groups += 1
+            convert_q.put((f"merged_shorts_{groups}", clips[idx:idx + 3]))
 
-    # Cleanup all temporary files/folders
-    for folder in ["Downed_clips", "Merged_All_Parts"]:
-        shutil.rmtree(os.path.join(script_dir, folder), ignore_errors=True)
-    for fname in os.listdir(script_dir):
-        if fname.startswith("part") and fname.endswith(".webm"):
-            try:
-                os.remove(os.path.join(script_dir, fname))
-            except Exception:
-                pass
+    print(f"\n[INFO] Processing {NUM_PARTS} parts in parallel...")
+    try:
+        # one worker process per part; each loads EasyOCR once in init_worker,
+        # and with several CUDA GPUs each worker gets its own
+        ctx = mp.get_context("spawn")
+        num_gpus = torch.cuda.device_count() if torch is not None else 0
+        with ProcessPoolExecutor(max_workers=NUM_PARTS, mp_context=ctx, initializer=init_worker,
+                                 initargs=(ctx.Value("i", 0), num_gpus)) as pool:
+            futures = {i: pool.submit(process_part, task) for i, task in enumerate(tasks) if i not in done}
+            failed = None
+            for i in range(NUM_PARTS):
+                if i in done:
+                    clips = done[i]
+                else:
+                    # process_part raises if its decode or extract stage
+                    # failed, so only complete parts are ever checkpointed
+                    try:
+                        clips = futures[i].result()
+                    except Exception as e:
+                        print(f"[ERROR] Part {i + 1}/{NUM_PARTS} failed: {e}")
+                        failed = failed or e
+                        continue
+                    save_progress(progress_path, run_key, i, clips)
+                print(f"[INFO] Part {i + 1}/{NUM_PARTS} done: {len(clips)} clip(s)")
+                if failed:
+                    continue  # still checkpoint later parts, but stop converting
+                pending.extend(clips)
+                full = len(pending) - len(pending) % 3
+                if full:
+                    flush(pending[:full])
+                    pending = pending[full:]
+        if failed:
+            raise failed
+        if pending:
+            flush(pending)
+    finally:
+        for t in converters:
+            convert_q.put(None)
+        for t in converters:
+            t.join()
+    if convert_errors:
+        raise convert_errors[0]
+
+    # Cleanup all temporary files/folders (the run completed, so the
+    # checkpoint goes too)
+    shutil.rmtree(downed_root, ignore_errors=True)
+
+    if not groups:
+        print("[INFO] No ENEMY DOWNED events found.")
+        return
+    print(f"[INFO] Total merged global clips: {groups}")
 
     gc.collect()
     print("\n✅ [DONE] All outputs saved in:")